@@ -3,18 +3,22 @@
 # dependencies = [
 #   "typer>=0.9.0",
 #   "rich>=13.0",
-#   "sh>=2.0",
-#   "pyyaml>=6.0",
-#   "requests>=2.31",
+#   "httpx[http2]>=0.27",
+#   "pynacl>=1.5",
 # ]
 # ///
 """
 VPS Service Creator - Unified script for creating services with DNS
 """
 
+import atexit
+import functools
+import io
 import os
+import subprocess
 import sys
 import tempfile
+import time
 import shutil
 from pathlib import Path
 from typing import Optional, Annotated
@@ -22,21 +26,135 @@ from enum import Enum
 
 import typer
 from typer import Option, Argument
-import yaml
 from rich.console import Console
 from rich.panel import Panel
-from rich.table import Table
 from rich.prompt import Prompt, Confirm, IntPrompt
-from rich.progress import Progress, SpinnerColumn, TextColumn
-import requests
+import re
+import random
 import secrets
-import string
-import sh
+import socket
 import json
 
 __version__ = "2.3.0"
 
-console = Console()
+# Output is already explicitly styled, so skip rich's per-print
+# syntax-highlighting regex pass
+console = Console(highlight=False, soft_wrap=True)
+
+@functools.lru_cache(maxsize=1)
+def http_session():
+    """Pooled HTTP/2 client for all HTTPS traffic, created on first use.
+
+    One client means TCP+TLS handshakes are paid once per host, and
+    concurrent GitHub calls (e.g. the parallel secret uploads) multiplex
+    as streams over a single connection; the lazy import keeps the slow
+    httpx import off the --help/--version startup path.
+    """
+    import httpx
+
+    return httpx.Client(
+        follow_redirects=True,
+        timeout=30.0,
+        transport=httpx.HTTPTransport(http2=True, retries=3),
+    )
+
+
+class _ResponseReader(io.RawIOBase):
+    """File-like view over a streaming httpx response, for tarfile."""
+
+    def __init__(self, response):
+        self._chunks = response.iter_bytes()
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buffer:
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                return 0
+        n = min(len(b), len(self._buffer))
+        b[:n], self._buffer = self._buffer[:n], self._buffer[n:]
+        return n
+
+
+def _run(cmd: list, *, check: bool = True, capture: bool = False,
+         cwd: Optional[Path] = None) -> subprocess.CompletedProcess:
+    """Run a command and wait: one fork/exec, no pump threads.
+
+    With capture=True, stdout/stderr come back as text on the result;
+    otherwise they pass through to the terminal.
+    """
+    return subprocess.run(
+        cmd,
+        check=check,
+        cwd=str(cwd) if cwd else None,
+        stdout=subprocess.PIPE if capture else None,
+        stderr=subprocess.PIPE if capture else None,
+        text=True,
+    )
+
+# SSH connection multiplexing: one master connection per host, reused by every
+# subsequent ssh/ssh-copy-id invocation (ControlPersist keeps it warm between
+# commands instead of paying a full handshake each time).
+_SSH_CONTROL_DIR = Path(tempfile.mkdtemp(prefix="vps-manager-ssh-"))
+SSH_OPTS = (
+    "-o", "ControlMaster=auto",
+    "-o", f"ControlPath={_SSH_CONTROL_DIR}/cm-%r@%h:%p",
+    "-o", "ControlPersist=600",
+)
+
+# Common quiet-ssh argv prefix, assembled once at module load instead of
+# rebuilt per call; also keeps the option set auditable in one place
+_SSH_BASE: tuple = ("ssh", *SSH_OPTS, "-q", "-o", "LogLevel=ERROR")
+
+
+def open_ssh_master(vps_host: str) -> None:
+    """Ensure a multiplexed SSH master connection exists in the background.
+
+    An earlier connection (the reachability probe, ssh-copy-id) may have
+    already spawned the master via ControlMaster=auto; in that case there
+    is nothing to do, and starting a second one with -M would just print
+    "ControlSocket already exists" and leak a plain background ssh.
+    """
+    check = subprocess.run(
+        ["ssh", *SSH_OPTS, "-O", "check", f"root@{vps_host}"],
+        check=False, capture_output=True,
+    )
+    if check.returncode == 0:
+        return
+    subprocess.run(
+        ["ssh", *SSH_OPTS, "-o", "LogLevel=ERROR", "-Nf", f"root@{vps_host}"],
+        check=False,
+    )
+
+
+def close_ssh_master(vps_host: str) -> None:
+    """Tear down the multiplexed SSH master connection, if any."""
+    subprocess.run(
+        ["ssh", *SSH_OPTS, "-O", "exit", f"root@{vps_host}"],
+        check=False, capture_output=True,
+    )
+
+
+@atexit.register
+def _teardown_ssh_masters() -> None:
+    """Safety net: close any masters still alive on exit and drop the dir.
+
+    Normal teardown happens via close_ssh_master; this catches early
+    exits (validation errors, Ctrl-C) so no orphaned master keeps the
+    control socket dir alive for ControlPersist's full timeout.
+    """
+    for sock in _SSH_CONTROL_DIR.glob("cm-*"):
+        subprocess.run(
+            ["ssh", "-o", f"ControlPath={sock}", "-O", "exit", "unused-host"],
+            check=False, capture_output=True,
+        )
+    shutil.rmtree(_SSH_CONTROL_DIR, ignore_errors=True)
+
+
 app = typer.Typer(
     help="VPS Service Creator - Create services with integrated DNS management",
     rich_markup_mode="rich",
@@ -71,6 +189,27 @@ def get_template_color(template_name: str) -> str:
     return colors[hash_int % len(colors)]
 
 
+def _extract_tar_subtree(tar_path: Path, subtree: str, dest: Path) -> None:
+    """Extract one subtree of a repo tarball into dest.
+
+    Tarball members are prefixed with the top-level '<name>-main/' directory;
+    only members under subtree are extracted, with both prefixes stripped
+    (like tar --strip-components), so the subtree's contents land in dest.
+    """
+    import tarfile
+
+    dest.mkdir(parents=True, exist_ok=True)
+    prefix = subtree.rstrip("/") + "/"
+    with tarfile.open(tar_path, "r:gz") as tf:
+        for member in tf.getmembers():
+            parts = member.name.split("/", 1)
+            if len(parts) < 2 or not parts[1].startswith(prefix):
+                continue
+            member.name = parts[1][len(prefix):]
+            if member.name:
+                tf.extract(member, dest)
+
+
 def discover_templates(vps_manager_repo: str) -> dict[str, str]:
     """Discover available templates by downloading and scanning the templates directory."""
     templates = {}
@@ -79,17 +218,16 @@ def discover_templates(vps_manager_repo: str) -> dict[str, str]:
         try:
             # Download the repo to scan templates
             template_url = f"https://github.com/{vps_manager_repo}/archive/main.tar.gz"
-            response = requests.get(template_url, stream=True)
-            response.raise_for_status()
-            
             tar_path = Path(tmpdir) / "repo.tar.gz"
-            with open(tar_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            with http_session().stream("GET", template_url) as response:
+                response.raise_for_status()
+                with open(tar_path, 'wb') as f:
+                    # Large-block copy instead of a Python-level 8KB chunk loop
+                    for chunk in response.iter_bytes(1024 * 1024):
+                        f.write(chunk)
             
             # Extract just the templates directory
-            sh.tar("xzf", str(tar_path), "-C", tmpdir, "--strip-components=1", 
-                   "vps-manager-main/templates/")
+            _extract_tar_subtree(tar_path, "templates", Path(tmpdir) / "templates")
             
             # Scan for template directories (exclude template-base)
             templates_dir = Path(tmpdir) / "templates"
@@ -133,75 +271,138 @@ def version_callback(value: bool):
 
 def generate_password(length: int = 16) -> str:
     """Generate a secure random password."""
-    alphabet = string.ascii_letters + string.digits
-    return ''.join(secrets.choice(alphabet) for _ in range(length))
+    # One CSPRNG call instead of one per character; map the two non-alnum
+    # base64url characters away to keep the [A-Za-z0-9] alphabet
+    return secrets.token_urlsafe(length)[:length].replace("-", "A").replace("_", "a")
+
+
+# gh auth is re-verified at most once an hour; the marker file's mtime
+# records the last successful check
+_REQUIREMENTS_MARKER = Path.home() / ".cache" / "vps-manager" / "requirements-ok"
+_REQUIREMENTS_TTL = 3600
+
+_DNS_CACHE_PATH = Path.home() / ".cache" / "vps-manager" / "dns.json"
+_DNS_CACHE_TTL = 900
 
 
+@functools.lru_cache(maxsize=None)
 def check_requirements() -> None:
     """Check that required tools are installed."""
-    # Check for git
-    try:
-        sh.git("--version", _out=lambda x: None)
-    except sh.CommandNotFound:
+
+    # Pure PATH lookups - no fork+exec just to prove a binary exists
+    if not shutil.which("git"):
         console.print("[red]Error:[/red] git is required but not found")
         raise typer.Exit(1)
-    
-    # Check for gh CLI
-    try:
-        sh.gh("--version", _out=lambda x: None)
-    except sh.CommandNotFound:
+
+    if not shutil.which("gh"):
         console.print("[red]Error:[/red] GitHub CLI (gh) is required. Install from https://cli.github.com/")
         raise typer.Exit(1)
-    
-    # Check gh auth
+
+    # gh auth status forks gh and hits the network; skip it when a recent
+    # run already verified authentication
     try:
-        sh.gh("auth", "status", _out=lambda x: None, _err=lambda x: None)
-    except sh.ErrorReturnCode:
+        if time.time() - _REQUIREMENTS_MARKER.stat().st_mtime < _REQUIREMENTS_TTL:
+            return
+    except OSError:
+        pass
+
+    if _run(["gh", "auth", "status"], check=False, capture=True).returncode != 0:
         console.print("[red]Error:[/red] GitHub CLI not authenticated. Run: gh auth login")
         raise typer.Exit(1)
 
-    # Check for jq (used to sanitize gh JSON output)
-    try:
-        sh.jq("--version", _out=lambda x: None)
-    except sh.CommandNotFound:
-        console.print("[red]Error:[/red] jq is required but not found. Install jq and retry.")
-        console.print("macOS: brew install jq | Debian/Ubuntu: sudo apt-get install jq | Alpine: apk add jq")
-        raise typer.Exit(1)
+    _REQUIREMENTS_MARKER.parent.mkdir(parents=True, exist_ok=True)
+    _REQUIREMENTS_MARKER.touch()
+
+
+def download_repo_tarball(repo: str, dest: Path) -> None:
+    """Download a repo's main-branch tarball and extract it into dest.
+
+    Streams the GitHub archive straight into tarfile, stripping the
+    top-level '<name>-main/' directory (like --strip-components=1).
+    """
+    import tarfile
+
+    tarball_url = f"https://github.com/{repo}/archive/refs/heads/main.tar.gz"
+    with http_session().stream("GET", tarball_url) as response:
+        response.raise_for_status()
+        dest.mkdir(parents=True, exist_ok=True)
+        with tarfile.open(fileobj=_ResponseReader(response), mode="r|gz") as tf:
+            for member in tf:
+                parts = member.name.split("/", 1)
+                if len(parts) < 2 or not parts[1]:
+                    continue  # Skip the top-level wrapper directory itself
+                member.name = parts[1]
+                tf.extract(member, dest)
 
 
 def clone_vps_manager_repo(repo: str) -> Path:
-    """Clone vps-manager repo to a temporary directory."""
-    import tempfile
+    """Fetch vps-manager repo contents into a temporary directory."""
     temp_dir = Path(tempfile.mkdtemp(prefix="vps-manager-"))
-    
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        console=console,
-    ) as progress:
-        task = progress.add_task(f"Cloning {repo}...", total=None)
+    dest = temp_dir / "vps-manager"
+
+    with console.status(f"Downloading {repo}...") as status:
         try:
-            sh.git("clone", f"https://github.com/{repo}.git", str(temp_dir / "vps-manager"))
-            progress.update(task, completed=True)
-        except sh.ErrorReturnCode as e:
-            console.print(f"[red]Failed to clone {repo}[/red]")
-            raise typer.Exit(1)
-    
-    return temp_dir / "vps-manager"
+            # One HTTPS GET of the tarball beats a full git clone (no refs,
+            # no history, no pack negotiation)
+            download_repo_tarball(repo, dest)
+        except Exception:
+            # Tarball can 404 (e.g. non-default branch name) - fall back to a
+            # shallow partial clone, streaming git's progress into the spinner
+            # so a slow fetch doesn't look like a hang
+            proc = subprocess.Popen(
+                ["git", "clone", "--depth=1", "--single-branch", "--filter=blob:none",
+                 "--progress", f"https://github.com/{repo}.git", str(dest)],
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+            pct_re = re.compile(r"Receiving objects:\s+(\d+)%")
+            for line in proc.stderr:
+                match = pct_re.search(line)
+                if match:
+                    status.update(f"Cloning {repo}... {match.group(1)}%")
+            if proc.wait() != 0:
+                console.print(f"[red]Failed to download {repo}[/red]")
+                raise typer.Exit(1)
+
+    return dest
+
+
+
+def _discard_temp_clone(path: Path) -> None:
+    """Remove a temporary clone without blocking the CLI on the unlinks.
+
+    The tree is renamed out of the way (atomic), then a detached rm -rf
+    reclaims the inodes in the background while the CLI returns to the
+    user; if either step fails, fall back to removing it in-process.
+    """
+    trash = path.with_name(f".trash-{secrets.token_hex(4)}")
+    try:
+        os.rename(path, trash)
+        subprocess.Popen(
+            ["rm", "-rf", str(trash)],
+            start_new_session=True,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    except OSError:
+        shutil.rmtree(trash if trash.exists() else path, ignore_errors=True)
 
 
 def test_ssh_connection(vps_host: str) -> str:
     """Test SSH connection and prompt for method if needed. Returns auth method."""
     console.print(f"\n[bold]Testing SSH connection to {vps_host}...[/bold]")
     
-    try:
-        # Try key-based auth first
-        sh.ssh("-o", "BatchMode=yes", "-o", "ConnectTimeout=5", 
-               f"root@{vps_host}", "echo", "Connection successful", 
-               _out=lambda x: None, _err=lambda x: None)
+    # Try key-based auth first
+    result = _run(
+        ["ssh", *SSH_OPTS, "-o", "BatchMode=yes", "-o", "ConnectTimeout=5",
+         f"root@{vps_host}", "echo", "Connection successful"],
+        check=False, capture=True,
+    )
+    if result.returncode == 0:
         console.print("[green]✓[/green] SSH key authentication successful")
         return "key"
-    except sh.ErrorReturnCode:
+    else:
         console.print("[yellow]SSH key authentication failed[/yellow]")
         console.print("\n[bold]Choose how to proceed:[/bold]")
         
@@ -238,9 +439,8 @@ def test_ssh_connection(vps_host: str) -> str:
 def setup_ssh_key(vps_host: str) -> None:
     """Copy SSH key to the VPS for future passwordless access."""
     console.print("\n[bold]Setting up SSH key for future access...[/bold]")
-    
+
     # Check if we have an SSH key
-    import os
     ssh_key_path = os.path.expanduser("~/.ssh/id_rsa.pub")
     if not os.path.exists(ssh_key_path):
         # Try other common key types
@@ -252,19 +452,20 @@ def setup_ssh_key(vps_host: str) -> None:
         else:
             console.print("[yellow]No SSH key found. Generating one...[/yellow]")
             try:
-                sh.ssh_keygen("-t", "ed25519", "-f", os.path.expanduser("~/.ssh/id_ed25519"), "-N", "")
+                _run(["ssh-keygen", "-t", "ed25519",
+                      "-f", os.path.expanduser("~/.ssh/id_ed25519"), "-N", ""],
+                     capture=True)
                 ssh_key_path = os.path.expanduser("~/.ssh/id_ed25519.pub")
                 console.print("[green]✓[/green] SSH key generated")
-            except sh.ErrorReturnCode:
+            except subprocess.CalledProcessError:
                 console.print("[red]Failed to generate SSH key[/red]")
                 return
     
     # Copy the key
     console.print(f"[dim]→ ssh-copy-id -o PubkeyAuthentication=no root@{vps_host}[/dim]")
     try:
-        import subprocess
         process = subprocess.run(
-            ["ssh-copy-id", "-o", "PubkeyAuthentication=no", f"root@{vps_host}"],
+            ["ssh-copy-id", *SSH_OPTS, "-o", "PubkeyAuthentication=no", f"root@{vps_host}"],
             check=True
         )
         console.print("[green]✓[/green] SSH key copied successfully!")
@@ -275,7 +476,6 @@ def setup_ssh_key(vps_host: str) -> None:
 
 def ssh_command(host: str, command: str, description: str) -> bool:
     """Execute a single SSH command with progress reporting."""
-    import subprocess
     
     # Show what we're doing
     console.print(f"\n[bold]{description}[/bold]")
@@ -286,15 +486,7 @@ def ssh_command(host: str, command: str, description: str) -> bool:
         # -q and LogLevel=ERROR suppress non-essential messages like
         # "Connection to <host> closed." while keeping prompts visible
         process = subprocess.run(
-            [
-                "ssh",
-                "-q",
-                "-o",
-                "LogLevel=ERROR",
-                "-t",
-                host,
-                command,
-            ],
+            [*_SSH_BASE, "-t", host, command],
             check=True,
         )
         console.print(f"[green]✓[/green] {description}")
@@ -307,104 +499,160 @@ def ssh_command(host: str, command: str, description: str) -> bool:
         raise typer.Exit(1)
 
 
-def create_vps_user(vps_host: str, service_name: str) -> tuple[str, str]:
-    """Create service user on VPS and return username and password."""
-    service_user = f"svc-{service_name}"
-    service_password = generate_password()
-    
-    console.print(f"\n[bold]Creating service user: {service_user}[/bold]")
-    
-    # Step 1: Create user
-    if not ssh_command(
-        f"root@{vps_host}",
-        f"useradd -m -s /bin/bash -d /home/{service_user} {service_user}",
-        f"Creating user {service_user}..."
-    ):
-        # User might already exist, try to continue
-        console.print("[yellow]User might already exist, continuing...[/yellow]")
-    
-    # Step 2: Set password
-    if not ssh_command(
-        f"root@{vps_host}",
-        f"echo '{service_user}:{service_password}' | chpasswd",
-        "Setting user password..."
-    ):
-        console.print("[red]Failed to set user password[/red]")
-        raise typer.Exit(1)
-    
-    # Step 3: Add to docker group
-    if not ssh_command(
-        f"root@{vps_host}",
-        f"usermod -aG docker {service_user}",
-        "Adding user to docker group..."
-    ):
-        console.print("[red]Failed to add user to docker group[/red]")
-        raise typer.Exit(1)
-    
-    # Step 4: Create directories
+def build_provision_script(service_name: str, service_user: str,
+                           service_password: str) -> str:
+    """Build the remote provisioning script for a service user.
+
+    Runs all steps in one bash program (a single parse on the remote side),
+    echoing STEP:/WARN: markers so the client can show per-step feedback.
+    Interpolated values are shell-quoted so a password containing shell
+    metacharacters can never break out of the generated script.
+    """
+    import shlex
+
+    user = shlex.quote(service_user)
+    chpasswd_input = shlex.quote(f"{service_user}:{service_password}")
     directories = [
         f"/apps/{service_name}",
         f"/persistent/{service_name}/data",
         f"/logs/{service_name}"
     ]
-    
-    for directory in directories:
-        if not ssh_command(
-            f"root@{vps_host}",
-            f"mkdir -p {directory}",
-            f"Creating directory {directory}..."
-        ):
-            console.print(f"[red]Failed to create directory {directory}[/red]")
-            raise typer.Exit(1)
-    
-    # Step 5: Set ownership
-    for directory in directories:
-        if not ssh_command(
-            f"root@{vps_host}",
-            f"chown -R {service_user}:{service_user} {directory}",
-            f"Setting ownership for {directory}..."
-        ):
-            console.print(f"[red]Failed to set ownership for {directory}[/red]")
-            raise typer.Exit(1)
-    
-    # Step 6: Set permissions
-    for directory in directories:
-        if not ssh_command(
-            f"root@{vps_host}",
-            f"chmod 755 {directory}",
-            f"Setting permissions for {directory}..."
-        ):
-            console.print(f"[red]Failed to set permissions for {directory}[/red]")
+
+    script_lines = [
+        "set -e",
+        f"echo 'STEP:Creating user {service_user}...'",
+        # -G at creation time writes passwd/shadow/group in one useradd
+        # transaction; usermod only runs when the user already exists
+        f"useradd -m -s /bin/bash -d /home/{user} -G docker {user} "
+        f"|| {{ echo 'WARN:User might already exist, continuing...'; "
+        f"usermod -aG docker {user}; }}",
+        "echo 'STEP:Setting user password...'",
+        f"echo {chpasswd_input} | chpasswd",
+    ]
+    # One mkdir/chown/chmod invocation covering all three trees: a single
+    # fork each with kernel-side recursion, instead of per-directory jobs
+    quoted_dirs = " ".join(shlex.quote(directory) for directory in directories)
+    script_lines += [
+        "echo 'STEP:Setting up service directories...'",
+        f"mkdir -p {quoted_dirs}",
+        f"chown -R {user}:{user} {quoted_dirs}",
+        f"chmod 755 {quoted_dirs}",
+    ]
+    return "\n".join(script_lines) + "\n"
+
+
+def render_credentials(service_user: str, service_password: str, vps_host: str):
+    """Build the credentials table shown once after user creation."""
+    from rich.table import Table
+    creds_table = Table(title="🔐 Service Credentials (SAVE THESE!)")
+    creds_table.add_column("Field", style="cyan")
+    creds_table.add_column("Value", style="green")
+    creds_table.add_row("Username", service_user)
+    creds_table.add_row("Password", service_password)
+    creds_table.add_row("SSH Command", f"ssh {service_user}@{vps_host}")
+    return creds_table
+
+
+def create_vps_user(vps_host: str, service_name: str) -> tuple[str, str]:
+    """Create service user on VPS and return username and password."""
+
+    service_user = f"svc-{service_name}"
+    service_password = generate_password()
+
+    console.print(f"\n[bold]Creating service user: {service_user}[/bold]")
+
+    script = build_provision_script(service_name, service_user, service_password)
+
+    try:
+        process = subprocess.Popen(
+            [*_SSH_BASE, "-T", f"root@{vps_host}", "bash -s"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        try:
+            process.stdin.write(script)
+            process.stdin.close()
+        except OSError:
+            # ssh died before consuming the script (e.g. connection
+            # refused); fall through to the non-zero exit check below
+            pass
+        for line in process.stdout:
+            line = line.strip()
+            if line.startswith("STEP:"):
+                console.print(f"[green]✓[/green] {line[5:]}")
+            elif line.startswith("WARN:"):
+                console.print(f"[yellow]{line[5:]}[/yellow]")
+        if process.wait() != 0:
+            console.print(f"[red]Failed to provision service user {service_user}[/red]")
             raise typer.Exit(1)
-    
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Operation cancelled by user[/yellow]")
+        raise typer.Exit(1)
+
     console.print(f"[green]✓[/green] Service user {service_user} created successfully!")
     return service_user, service_password
 
 
+def _remote_busy_ports(vps_host: str) -> set[int]:
+    """Fetch all TCP ports with listeners on the VPS in one SSH call.
+
+    Only the non-privileged range is scanned: services never get a port
+    below 1024, and filtering kernel-side keeps the output small.
+    """
+    cmd = [
+        *_SSH_BASE, f"root@{vps_host}",
+        "(command -v ss >/dev/null && ss -ltnH '( sport >= :1024 )') || (command -v netstat >/dev/null && netstat -ltn | tail -n +3) || true"
+    ]
+    # Stay in bytes: the output is ASCII addresses and int() takes bytes
+    # directly, so there's no reason to pay for a decode pass
+    result = subprocess.run(cmd, capture_output=True)
+    busy = set()
+    for line in result.stdout.splitlines():
+        fields = line.split()
+        if len(fields) >= 4:
+            port_str = fields[3].rsplit(b":", 1)[-1]
+            if port_str.isdigit():
+                busy.add(int(port_str))
+    return busy
+
+
 def suggest_free_port(vps_host: str, preferred_port: int = 3000) -> int:
     """Suggest a free TCP port on the VPS, starting from preferred_port.
-    Checks common listeners using ss/lsof, increments until free.
+
+    One remote listener scan, then the search runs locally - no extra
+    round-trips no matter how crowded the host is.
     """
-    import subprocess
+    try:
+        busy = _remote_busy_ports(vps_host)
+    except OSError:
+        return preferred_port
     port = preferred_port
     while port < 65535:
-        try:
-            cmd = [
-                "ssh", "-q", "-o", "LogLevel=ERROR", f"root@{vps_host}",
-                f"(command -v ss >/dev/null && ss -ltn '( sport = :{port} )' | tail -n +2) || (command -v lsof >/dev/null && lsof -iTCP:{port} -sTCP:LISTEN) || true"
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            busy = bool(result.stdout.strip())
-            if not busy:
-                return port
-        except Exception:
-            # On error, still try next port
-            pass
+        if port not in busy:
+            return port
         port += 1
     # Fallback
     return preferred_port
 
 
+def _iter_template_files(root: Path):
+    """Yield files under root without building Path objects for every entry.
+
+    os.scandir returns cached file-type info, so the walk avoids one stat
+    per entry compared to rglob; .git is pruned outright.
+    """
+    stack = [str(root)]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name != ".git":
+                        stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield Path(entry.path)
+
+
 def setup_local_files(local_path: Path, service_name: str, vps_manager_repo: str,
                      template_type: str = "js-express", domain: Optional[str] = None, 
                      provider: Optional[str] = None) -> None:
@@ -414,60 +662,81 @@ def setup_local_files(local_path: Path, service_name: str, vps_manager_repo: str
     # Create directory if needed
     local_path.mkdir(parents=True, exist_ok=True)
     
-    # Download templates
-    with tempfile.TemporaryDirectory() as tmpdir:
-        template_url = f"https://github.com/{vps_manager_repo}/archive/main.tar.gz"
-        response = requests.get(template_url, stream=True)
+    # Stream template members straight out of the download into the
+    # destination: no temp staging dir, no copytree round-trip, each byte
+    # is gunzipped and written exactly once. Tech-template members always
+    # win, base members fill the gaps, and files the user already has are
+    # left alone.
+    import tarfile
+
+    template_url = f"https://github.com/{vps_manager_repo}/archive/main.tar.gz"
+    console.print(f"[green]✓[/green] Extracting base and {template_type} templates...")
+    base_prefix = "templates/template-base/"
+    tech_prefix = f"templates/template-{template_type}/"
+    tech_skip = {".github", "infra", "README.md", "env.example"}
+    written: set = set()       # Paths this extraction created
+    replaced_dirs: set = set()  # Tech top-level dirs already swapped in
+
+    with http_session().stream("GET", template_url) as response:
         response.raise_for_status()
-        
-        tar_path = Path(tmpdir) / "templates.tar.gz"
-        with open(tar_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-        
-        # Extract base template files
-        console.print(f"[green]✓[/green] Extracting base template...")
-        sh.tar("xzf", str(tar_path), "-C", tmpdir, "--strip-components=3", 
-               "vps-manager-main/templates/template-base/")
-        
-        # Copy base files first
-        base_dir = Path(tmpdir)
-        for item in base_dir.iterdir():
-            if item.name == "templates.tar.gz":
-                continue
-            dest = local_path / item.name
-            if dest.exists():
-                console.print(f"[yellow]![/yellow] Skipping existing base file: {item.name}")
-            else:
-                if item.is_dir():
-                    shutil.copytree(item, dest)
+        with tarfile.open(fileobj=_ResponseReader(response), mode="r|gz") as tf:
+            for member in tf:
+                parts = member.name.split("/", 1)
+                if len(parts) < 2:
+                    continue
+                name = parts[1]
+                if name.startswith(tech_prefix):
+                    member.name = name[len(tech_prefix):]
+                    if not member.name:
+                        continue
+                    top = member.name.split("/", 1)[0]
+                    if top in tech_skip:
+                        continue  # Covered by the base template
+                    # Tech dirs replace whatever is there wholesale, as the
+                    # old rmtree+copytree did
+                    dest = local_path / member.name
+                    if (member.isdir() and "/" not in member.name
+                            and member.name not in replaced_dirs):
+                        if dest.exists():
+                            shutil.rmtree(dest)
+                        replaced_dirs.add(member.name)
+                elif name.startswith(base_prefix):
+                    member.name = name[len(base_prefix):]
+                    if not member.name:
+                        continue
+                    dest = local_path / member.name
+                    if not member.isdir() and dest.exists():
+                        if dest not in written:
+                            console.print(f"[yellow]![/yellow] Skipping existing base file: {dest.name}")
+                        continue
                 else:
-                    shutil.copy2(item, dest)
-        
-        # Extract and copy tech-specific template
-        console.print(f"[green]✓[/green] Extracting {template_type} template...")
-        tech_tmpdir = Path(tmpdir) / "tech"
-        tech_tmpdir.mkdir()
-        
-        sh.tar("xzf", str(tar_path), "-C", str(tech_tmpdir), "--strip-components=3", 
-               f"vps-manager-main/templates/template-{template_type}/")
-        
-        # Copy tech-specific files (overwrite base files if needed)
-        for item in tech_tmpdir.iterdir():
-            if item.name in ["templates.tar.gz", ".github", "infra", "README.md", "env.example"]:
-                continue  # Skip files we already have from base
-            dest = local_path / item.name
-            if item.is_dir():
-                if dest.exists():
-                    shutil.rmtree(dest)
-                shutil.copytree(item, dest)
-            else:
-                # Always copy tech-specific files, including Makefile overrides
-                shutil.copy2(item, dest)
-    
+                    continue
+                written.add(dest)
+                tf.extract(member, local_path)
+
     # Replace placeholders in all text files
     console.print(f"[green]✓[/green] Customizing template...")
-    
+
+    # Single-pass substitution: one precompiled alternation, longest keys
+    # first so 'myapp.example.com' wins over 'myapp'. Workflow-specific
+    # replacements ride along in the same mapping instead of a second pass.
+    mapping = {
+        "app-template": service_name,
+        "myapp": service_name,
+    }
+    if domain:
+        mapping["myapp.example.com"] = domain
+        if provider:
+            mapping["provider: cloudflare"] = f"provider: {provider}"
+    # Work on bytes end-to-end: the needle scan, the regex and the rewrite
+    # all skip the UTF-8 decode/encode round-trip
+    bmapping = {key.encode("utf-8"): value.encode("utf-8")
+                for key, value in mapping.items()}
+    pattern = re.compile(
+        b"|".join(re.escape(key) for key in sorted(bmapping, key=len, reverse=True))
+    )
+
+
     def is_text_file(file_path: Path) -> bool:
         """Check if a file is likely a text file that can be safely processed."""
         # Known text file extensions
@@ -495,96 +764,86 @@ def setup_local_files(local_path: Path, service_name: str, vps_manager_repo: str
         except:
             return False
     
-    for file_path in local_path.rglob("*"):
-        if file_path.is_file() and is_text_file(file_path):
+    # Cheap bytes-level needle check first so files without any placeholder
+    # are never rewritten
+    for file_path in _iter_template_files(local_path):
+        if is_text_file(file_path):
             try:
-                content = file_path.read_text(encoding='utf-8')
-                
-                # Generic placeholder replacements
-                content = content.replace("myapp", service_name)
-                content = content.replace("app-template", service_name)
-                
-                if domain:
-                    content = content.replace("myapp.example.com", domain)
-                
-                file_path.write_text(content, encoding='utf-8')
+                data = file_path.read_bytes()
+                if not any(needle in data for needle in bmapping):
+                    continue
+                new_data = pattern.sub(lambda m: bmapping[m.group(0)], data)
+                if new_data != data:
+                    file_path.write_bytes(new_data)
             except Exception:
                 pass  # Skip files that can't be processed
-    
+
     # All template-specific customization is now handled by the generic placeholder replacement above
     # No hardcoded template logic needed - everything is derived from the template files themselves
-    
-    # Update DNS workflows if domain and provider specified
-    if domain and provider:
-        for workflow in ["dns-plan.yml", "dns-apply.yml"]:
-            workflow_path = local_path / ".github" / "workflows" / workflow
-            if workflow_path.exists():
-                content = workflow_path.read_text()
-                content = content.replace("myapp.example.com", domain)
-                content = content.replace("provider: cloudflare", f"provider: {provider}")
-                workflow_path.write_text(content)
 
 
 def setup_github_repo(local_path: Path, service_name: str, repo_name: Optional[str],
                      vps_host: str, service_user: str, service_password: str,
                       vps_manager_repo: str, domain: Optional[str] = None, app_port: Optional[int] = None) -> str:
     """Initialize git repo and connect to GitHub."""
-    # Change to local path
-    git = sh.git.bake(_cwd=str(local_path))
-    gh = sh.gh.bake(_cwd=str(local_path))
-    
     # Ensure we have a repo_name by the end
     final_repo_name = repo_name
-    
+
     # Initialize git if needed
     if not (local_path / ".git").exists():
         console.print(f"[green]✓[/green] Initializing git repository...")
         try:
-            git("init", "-b", "main")
-        except sh.ErrorReturnCode:
-            git("init")
-            git("branch", "-M", "main")
-    
+            _run(["git", "init", "-b", "main"], cwd=local_path, capture=True)
+        except subprocess.CalledProcessError:
+            _run(["git", "init"], cwd=local_path, capture=True)
+            _run(["git", "branch", "-M", "main"], cwd=local_path, capture=True)
+
     # Add and commit if there are changes
     try:
-        status = git("status", "--porcelain").strip()
+        status = _run(["git", "status", "--porcelain"],
+                      cwd=local_path, capture=True).stdout.strip()
         if status:
             console.print(f"[green]✓[/green] Committing template files...")
-            git("add", ".")
-            git("commit", "-m", "Add VPS service template")
-    except sh.ErrorReturnCode:
+            _run(["git", "add", "."], cwd=local_path, capture=True)
+            _run(["git", "commit", "-m", "Add VPS service template"],
+                 cwd=local_path, capture=True)
+    except subprocess.CalledProcessError:
         pass  # No changes to commit
-    
+
     # Check for existing remote
-    try:
-        remote_url = git("remote", "get-url", "origin").strip()
+    remote = _run(["git", "remote", "get-url", "origin"],
+                  cwd=local_path, check=False, capture=True)
+    if remote.returncode == 0:
         # Already has remote - extract repo name from URL
+        remote_url = remote.stdout.strip()
         if remote_url.startswith("git@github.com:"):
             final_repo_name = remote_url.replace("git@github.com:", "").replace(".git", "")
         elif remote_url.startswith("https://github.com/"):
             final_repo_name = remote_url.replace("https://github.com/", "").replace(".git", "")
         console.print(f"[green]✓[/green] Using existing GitHub remote: {final_repo_name}")
-    except sh.ErrorReturnCode:
+    else:
         # Need to create/connect repo
         if not final_repo_name:
             # Try to create repo with service name
-            username = sh.gh("api", "user", "-q", ".login").strip()
+            username = _run(["gh", "api", "user", "-q", ".login"],
+                            capture=True).stdout.strip()
             final_repo_name = f"{username}/{service_name}"
-            
+
             console.print(f"[green]✓[/green] Creating GitHub repository: {final_repo_name}")
             try:
-                gh("repo", "create", service_name, "--private", 
-                   "--source=.", "--remote=origin", "--push")
-            except sh.ErrorReturnCode:
+                _run(["gh", "repo", "create", service_name, "--private",
+                      "--source=.", "--remote=origin", "--push"],
+                     cwd=local_path, capture=True)
+            except subprocess.CalledProcessError:
                 console.print(f"[red]Failed to create GitHub repo[/red]")
                 raise typer.Exit(1)
         else:
             # Connect to specified repo
             console.print(f"[green]✓[/green] Connecting to GitHub repository: {final_repo_name}")
-            git("remote", "add", "origin", f"git@github.com:{final_repo_name}.git")
-            try:
-                git("push", "-u", "origin", "main")
-            except sh.ErrorReturnCode:
+            _run(["git", "remote", "add", "origin", f"git@github.com:{final_repo_name}.git"],
+                 cwd=local_path, capture=True)
+            if _run(["git", "push", "-u", "origin", "main"],
+                    cwd=local_path, check=False).returncode != 0:
                 console.print("[yellow]Warning:[/yellow] Push failed. You may need to reconcile history.")
     
     # Set up GitHub secrets and variables
@@ -596,29 +855,126 @@ def setup_github_repo(local_path: Path, service_name: str, repo_name: Optional[s
         "VPS_PASSWORD": service_password,
     }
     
-    for name, value in secrets.items():
-        try:
-            gh("secret", "set", name, "-b", value)
-        except sh.ErrorReturnCode:
-            console.print(f"[yellow]Warning:[/yellow] Failed to set secret {name}")
-    
     variables = {
         "APP_PORT": str(app_port or 3000),
         "VPS_MANAGER_REPO": vps_manager_repo,
     }
-    
+
     if domain:
         variables["APP_DOMAIN"] = domain
-    
-    for name, value in variables.items():
+
+    # One public-key fetch, then encrypted PUTs/POSTs in parallel over the
+    # kept-alive pooled session instead of one gh fork per entry
+    import httpx
+    from concurrent.futures import ThreadPoolExecutor
+
+    def _set_item(kind: str, name: str, value: str) -> None:
+        setter = set_repo_secret if kind == "secret" else set_repo_variable
         try:
-            gh("variable", "set", name, "-b", value)
-        except sh.ErrorReturnCode:
-            console.print(f"[yellow]Warning:[/yellow] Failed to set variable {name}")
-    
+            ok = setter(final_repo_name, name, value)
+        except (httpx.HTTPError, KeyError, subprocess.CalledProcessError):
+            ok = False
+        if not ok:
+            console.print(f"[yellow]Warning:[/yellow] Failed to set {kind} {name}")
+
+    items = [("secret", name, value) for name, value in secrets.items()]
+    items += [("variable", name, value) for name, value in variables.items()]
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        futures = [(executor.submit(_set_item, *item), item) for item in items]
+        # Consume every future: anything _set_item didn't catch would
+        # otherwise vanish silently instead of producing a warning
+        for future, (kind, name, _value) in futures:
+            try:
+                future.result()
+            except Exception:
+                console.print(f"[yellow]Warning:[/yellow] Failed to set {kind} {name}")
+
     return final_repo_name
 
 
+def update_env(path: Path, updates: dict) -> None:
+    """Update KEY=VALUE entries in a .env file, atomically.
+
+    One pass over the lines with a dict of pending updates: matched keys
+    are rewritten in place, leftovers are appended, comments and
+    unrelated lines survive untouched. The result lands via a temp file
+    + os.replace so a Ctrl-C can't leave a torn .env behind.
+    """
+    pending = dict(updates)
+    lines = []
+    for line in path.read_text().splitlines():
+        key = line.split("=", 1)[0]
+        if "=" in line and not line.startswith("#") and key in pending:
+            lines.append(f"{key}={pending.pop(key)}")
+        else:
+            lines.append(line)
+    lines += [f"{key}={value}" for key, value in pending.items()]
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text("\n".join(lines) + "\n")
+    os.replace(tmp, path)
+
+
+@functools.lru_cache(maxsize=None)
+def _resolve_vps_ip(vps_host: str) -> str:
+    """Resolve vps_host to an IPv4 address with a bounded timeout.
+
+    Warm runs within 15 minutes hit an on-disk cache and skip the
+    resolver entirely. Falls back to treating vps_host as a literal IP
+    if resolution fails or takes longer than 2s (e.g. a broken
+    resolver), so the CLI never hangs on the system resolver timeout.
+    """
+    import queue
+    import threading
+
+    try:
+        entry = json.loads(_DNS_CACHE_PATH.read_text()).get(vps_host)
+        if entry and time.time() < entry["expires"]:
+            return entry["ip"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    # A bare daemon thread, not a ThreadPoolExecutor: pool workers are
+    # joined at interpreter shutdown, so a lookup stuck in a broken
+    # resolver would still stall the process on exit. A daemon thread is
+    # truly abandoned once the 2s deadline passes.
+    results: queue.Queue = queue.Queue(maxsize=1)
+
+    def _lookup() -> None:
+        try:
+            results.put(socket.getaddrinfo(vps_host, None, socket.AF_INET))
+        except socket.gaierror:
+            results.put(None)
+
+    threading.Thread(target=_lookup, daemon=True).start()
+    try:
+        info = results.get(timeout=2.0)
+        ip = info[0][4][0] if info else None
+    except queue.Empty:
+        ip = None
+
+    if ip is None:
+        # Not resolvable - only accept it as-is if it really is an IP address
+        import ipaddress
+        try:
+            ipaddress.ip_address(vps_host)
+        except ValueError:
+            console.print(f"[red]Error:[/red] Could not resolve VPS host: {vps_host}")
+            raise typer.Exit(1)
+        return vps_host
+
+    try:
+        try:
+            cache = json.loads(_DNS_CACHE_PATH.read_text())
+        except (OSError, ValueError):
+            cache = {}
+        cache[vps_host] = {"ip": ip, "expires": time.time() + _DNS_CACHE_TTL}
+        _DNS_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _DNS_CACHE_PATH.write_text(json.dumps(cache))
+    except OSError:
+        pass  # Cache is best-effort
+    return ip
+
+
 def write_dns_records_json(local_path: Path, domain: str, vps_ip: str, service_name: str,
                            netlify_team_slug: str = "") -> Path:
     """Write a minimal infra/dns-records.json into the service repo.
@@ -661,68 +1017,142 @@ def write_dns_records_json(local_path: Path, domain: str, vps_ip: str, service_n
     return records_path
 
 
+# Compiled once; the poll loop below can run for many minutes
+_PR_RE = re.compile(r"/pull/(\d+)$")
+
+
+@functools.lru_cache(maxsize=1)
+def _gh_token() -> str:
+    """Return the gh CLI's GitHub token (fetched once per run)."""
+    return _run(["gh", "auth", "token"], capture=True).stdout.strip()
+
+
+def _gh_api_headers() -> dict:
+    """Auth headers for direct GitHub REST calls over the pooled session."""
+    return {
+        "Authorization": f"token {_gh_token()}",
+        "Accept": "application/vnd.github+json",
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _repo_secret_box(repo_name: str):
+    """Fetch the repo's Actions public key once and build its SealedBox."""
+    from base64 import b64decode
+    from nacl.public import PublicKey, SealedBox
+
+    key_info = http_session().get(
+        f"https://api.github.com/repos/{repo_name}/actions/secrets/public-key",
+        headers=_gh_api_headers(),
+    ).json()
+    return key_info["key_id"], SealedBox(PublicKey(b64decode(key_info["key"])))
+
+
+def set_repo_secret(repo_name: str, name: str, value: str) -> bool:
+    """Set one Actions secret via a sealed-box-encrypted REST PUT."""
+    from base64 import b64encode
+
+    key_id, box = _repo_secret_box(repo_name)
+    response = http_session().put(
+        f"https://api.github.com/repos/{repo_name}/actions/secrets/{name}",
+        headers=_gh_api_headers(),
+        json={"encrypted_value": b64encode(box.encrypt(value.encode())).decode(),
+              "key_id": key_id},
+    )
+    return response.status_code in (201, 204)
+
+
+def set_repo_variable(repo_name: str, name: str, value: str) -> bool:
+    """Set one Actions variable via REST (create, falling back to update)."""
+    base = f"https://api.github.com/repos/{repo_name}/actions/variables"
+    payload = {"name": name, "value": value}
+    response = http_session().post(base, headers=_gh_api_headers(), json=payload)
+    if response.status_code == 409:
+        response = http_session().patch(
+            f"{base}/{name}", headers=_gh_api_headers(), json=payload
+        )
+    return response.status_code in (201, 204)
+
+
 def wait_for_pr_merge(pr_url: str, repo: str, domain: str) -> bool:
     """Wait for PR to be merged. Returns True if merged, False if closed/cancelled."""
-    import time
-    import re
-    
+
     # Extract PR number from URL
-    pr_match = re.search(r'/pull/(\d+)$', pr_url)
+    pr_match = _PR_RE.search(pr_url)
     if not pr_match:
         console.print("[red]Could not extract PR number from URL[/red]")
         return False
-    
+
     pr_number = pr_match.group(1)
     console.print(f"\n[yellow]Waiting for PR #{pr_number} to be merged...[/yellow]")
     console.print("You can merge it at: " + pr_url)
-    
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        console=console,
-    ) as progress:
-        task = progress.add_task("Waiting for PR merge...", total=None)
-        
+
+    # Poll the REST API directly over the pooled session with conditional
+    # requests: 304 responses carry no body and don't count against the
+    # rate limit
+    import httpx
+    session = http_session()
+    try:
+        auth_headers = _gh_api_headers()
+    except subprocess.CalledProcessError:
+        console.print("[red]Failed to get GitHub token (is gh authenticated?)[/red]")
+        return False
+    api_url = f"https://api.github.com/repos/{repo}/pulls/{pr_number}"
+    etag = None
+    backoff = 2.0
+
+    with console.status("Waiting for PR merge..."):
         while True:
             try:
-                # Check if PR still exists and get its state
-                try:
-                    # Use environment variables and sed to strip ANSI codes before jq
-                    pr_out = sh.gh(f"pr view {pr_number} --json state --repo {repo} | jq -r .state").strip()
-                    
-                    if pr_out == "MERGED":
-                        progress.update(task, completed=True)
+                headers = dict(auth_headers)
+                if etag:
+                    headers["If-None-Match"] = etag
+                response = session.get(api_url, headers=headers)
+
+                if response.status_code == 304:
+                    # Nothing changed since the last poll
+                    pass
+                elif response.status_code == 200:
+                    pr = response.json()
+                    if pr.get("merged"):
                         console.print(f"[green]✓[/green] PR #{pr_number} has been merged!")
                         return True
-                    elif pr_out == "CLOSED":
-                        progress.update(task, completed=True)
+                    if pr.get("state") == "closed":
                         console.print(f"[red]✗[/red] PR #{pr_number} was closed without merging")
                         return False
-                    elif pr_out == "OPEN":
-                        # Still open, continue waiting
-                        pass
-                    else:
-                        console.print(f"[yellow]Unknown PR state: {pr_out}[/yellow]")
-                        
-                except sh.ErrorReturnCode:
-                    # PR might not exist anymore (could mean it was merged and branch deleted)
-                    # Try to check if the branch was merged by checking git log
-                    try:
-                        sh.bash(
-                            "-lc",
-                            f"gh api repos/{repo}/git/refs/heads/dns-setup-{domain}",
-                            _out=lambda x: None
-                        )
-                        # Branch still exists, so PR wasn't merged
-                        pass
-                    except sh.ErrorReturnCode:
+                    if pr.get("mergeable") is None:
+                        # GitHub computes mergeability lazily and reports null
+                        # for a while after PR creation (longer with merge
+                        # queues). Don't record the ETag for this response: a
+                        # conditional re-poll would just 304 on the same stale
+                        # representation. Poll again quickly for a fresh one.
+                        time.sleep(1)
+                        continue
+                    etag = response.headers.get("ETag")
+                elif response.status_code == 404:
+                    # PR might not exist anymore (could mean it was merged and
+                    # branch deleted) - check the branch ref directly instead
+                    # of forking bash + gh for one HTTPS call
+                    ref_url = f"https://api.github.com/repos/{repo}/git/refs/heads/dns-setup-{domain}"
+                    if session.get(ref_url, headers=auth_headers).status_code == 404:
                         # Branch deleted, likely means PR was merged
-                        progress.update(task, completed=True)
                         console.print(f"[green]✓[/green] PR #{pr_number} appears to have been merged (branch deleted)!")
                         return True
-                
-                time.sleep(5)  # Check every 5 seconds
-            except sh.ErrorReturnCode as e:
+                    # Branch still exists, so PR wasn't merged
+                else:
+                    console.print(f"[yellow]Unexpected PR status response: {response.status_code}[/yellow]")
+
+                # Exponential backoff with jitter: fast merges are noticed
+                # within seconds, long waits settle at ~30s between polls
+                # without synchronizing with other pollers. GitHub may ask
+                # for a minimum interval via X-Poll-Interval - honor it.
+                delay = backoff
+                poll_hint = response.headers.get("X-Poll-Interval", "")
+                if poll_hint.isdigit():
+                    delay = max(delay, float(poll_hint))
+                time.sleep(delay * random.uniform(0.8, 1.2))
+                backoff = min(backoff * 1.5, 30.0)
+            except httpx.HTTPError as e:
                 console.print(f"[red]Failed to check PR status[/red] - error: {e}")
                 time.sleep(10)  # Retry on error
             except KeyboardInterrupt:
@@ -734,79 +1164,67 @@ def run_dns_apply(repo_name: str, domain: str, provider: str) -> bool:
     """Run the DNS apply workflow in the service repository."""
     console.print(f"\n[green]✓[/green] Running DNS apply workflow...")
     
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        console=console,
-    ) as progress:
-        task = progress.add_task("Triggering DNS apply...", total=None)
-        
+    with console.status("Triggering DNS apply..."):
+        # Dispatch over the pooled session instead of forking gh: one HTTPS
+        # call on an already-open connection
+        import httpx
+        url = f"https://api.github.com/repos/{repo_name}/actions/workflows/dns-apply.yml/dispatches"
         try:
-            # Trigger the workflow
-            output = sh.gh("workflow", "run", "dns-apply.yml", 
-                          "--repo", repo_name)
-            progress.update(task, completed=True)
-            
-            console.print(f"[green]✓[/green] DNS apply workflow triggered successfully!")
-            console.print(f"\nMonitor progress at: https://github.com/{repo_name}/actions")
-            return True
-        except sh.ErrorReturnCode as e:
+            response = http_session().post(
+                url, headers=_gh_api_headers(), json={"ref": "main"}
+            )
+            if response.status_code != 204:
+                console.print("[red]Failed to trigger DNS apply workflow[/red]")
+                console.print(response.text)
+                return False
+        except (httpx.HTTPError, subprocess.CalledProcessError) as e:
             console.print("[red]Failed to trigger DNS apply workflow[/red]")
-            if e.stderr:
-                console.print(e.stderr.decode())
+            console.print(str(e))
             return False
 
+    console.print(f"[green]✓[/green] DNS apply workflow triggered successfully!")
+    console.print(f"\nMonitor progress at: https://github.com/{repo_name}/actions")
+    return True
+
 
 def trigger_initial_deployment(local_path: Path, repo_name: str) -> bool:
     """Generate lockfiles, commit all files and push to trigger initial deployment."""
     console.print(f"\n[green]✓[/green] Preparing initial deployment...")
     
-    git = sh.git.bake(_cwd=str(local_path))
-    make = sh.make.bake(_cwd=str(local_path))
-    
     try:
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console,
-        ) as progress:
-            # Generate lockfiles using Makefile
-            task = progress.add_task("Generating lockfiles and updating dependencies...", total=None)
+        # One live spinner reused across phases instead of a fresh Progress
+        # display per step
+        with console.status("Generating lockfiles and updating dependencies...") as status:
             try:
-                make("update")
-                progress.update(task, completed=True)
+                _run(["make", "update"], cwd=local_path, capture=True)
                 console.print(f"[green]✓[/green] Lockfiles generated successfully")
-            except sh.ErrorReturnCode as e:
-                progress.update(task, completed=True)
+            except subprocess.CalledProcessError as e:
                 console.print(f"[yellow]Warning:[/yellow] Failed to generate lockfiles: {e}")
                 console.print("Continuing with deployment - lockfiles may need to be generated manually")
-            except sh.CommandNotFound:
-                progress.update(task, completed=True)
+            except FileNotFoundError:
                 console.print(f"[yellow]Warning:[/yellow] make command not found - skipping lockfile generation")
-            
+
             # Add all files (including generated lockfiles)
-            task = progress.add_task("Adding files to git...", total=None)
-            git("add", ".")
-            progress.update(task, completed=True)
-            
+            status.update("Adding files to git...")
+            _run(["git", "add", "."], cwd=local_path, capture=True)
+
             # Commit
-            task = progress.add_task("Committing initial deployment...", total=None)
-            git("commit", "-m", "Initial deployment - service setup complete with lockfiles")
-            progress.update(task, completed=True)
-            
+            status.update("Committing initial deployment...")
+            _run(["git", "commit", "-m", "Initial deployment - service setup complete with lockfiles"],
+                 cwd=local_path, capture=True)
+
             # Push to trigger deployment
-            task = progress.add_task("Pushing to trigger deployment...", total=None)
-            git("push", "origin", "main")
-            progress.update(task, completed=True)
-        
+            status.update("Pushing to trigger deployment...")
+            _run(["git", "push", "origin", "main"], cwd=local_path, capture=True)
+
         console.print(f"[green]✓[/green] Initial deployment triggered!")
         console.print(f"Monitor deployment at: https://github.com/{repo_name}/actions")
         return True
-        
-    except sh.ErrorReturnCode as e:
+
+    except subprocess.CalledProcessError as e:
         console.print("[red]Failed to trigger initial deployment[/red]")
-        if hasattr(e, 'stderr') and e.stderr:
-            console.print(e.stderr.decode())
+        if e.stderr:
+            console.print(e.stderr)
         return False
 
 
@@ -880,216 +1298,202 @@ def create_service(
         temp_clone_path = clone_vps_manager_repo(vps_manager_repo)
         vps_manager_path = temp_clone_path
     
-    # Interactive template selection if not provided
-    if not template:
-        console.print("\n[bold]Discovering available templates...[/bold]")
-        available_templates = discover_templates(vps_manager_repo)
+    try:
+        # Interactive template selection if not provided
+        if not template:
+            console.print("\n[bold]Discovering available templates...[/bold]")
+            available_templates = discover_templates(vps_manager_repo)
         
-        if not available_templates:
-            console.print("[red]Error:[/red] No templates found in the repository")
-            console.print("Make sure the repository has a 'templates/' directory with 'template-*' folders")
-            raise typer.Exit(1)
+            if not available_templates:
+                console.print("[red]Error:[/red] No templates found in the repository")
+                console.print("Make sure the repository has a 'templates/' directory with 'template-*' folders")
+                raise typer.Exit(1)
         
-        console.print("\n[bold]Select Service Template:[/bold]")
-        template_list = list(available_templates.items())
+            console.print("\n[bold]Select Service Template:[/bold]")
+            template_list = list(available_templates.items())
         
-        for i, (template_type, description) in enumerate(template_list, 1):
-            # Generate consistent color based on template name
-            color = get_template_color(template_type)
-            console.print(f"{i}. [{color}]{description}[/{color}]")
+            for i, (template_type, description) in enumerate(template_list, 1):
+                # Generate consistent color based on template name
+                color = get_template_color(template_type)
+                console.print(f"{i}. [{color}]{description}[/{color}]")
         
-        max_choice = len(template_list)
-        choice = IntPrompt.ask(
-            "\nSelect template",
-            choices=[str(i) for i in range(1, max_choice + 1)],
-            default=1
-        )
+            max_choice = len(template_list)
+            choice = IntPrompt.ask(
+                "\nSelect template",
+                choices=[str(i) for i in range(1, max_choice + 1)],
+                default=1
+            )
         
-        template = template_list[choice - 1][0]  # Get the template type
-        console.print(f"[green]✓[/green] Selected: {template}")
-    else:
-        # Validate CLI-provided template exists
-        console.print(f"\n[bold]Validating template: {template}[/bold]")
-        available_templates = discover_templates(vps_manager_repo)
+            template = template_list[choice - 1][0]  # Get the template type
+            console.print(f"[green]✓[/green] Selected: {template}")
+        else:
+            # Validate CLI-provided template exists
+            console.print(f"\n[bold]Validating template: {template}[/bold]")
+            available_templates = discover_templates(vps_manager_repo)
         
-        if template not in available_templates:
-            console.print(f"[red]Error:[/red] Template '{template}' not found")
-            console.print("Available templates:")
-            for template_type, description in available_templates.items():
-                console.print(f"  • {template_type}: {description}")
-            raise typer.Exit(1)
+            if template not in available_templates:
+                console.print(f"[red]Error:[/red] Template '{template}' not found")
+                console.print("Available templates:")
+                for template_type, description in available_templates.items():
+                    console.print(f"  • {template_type}: {description}")
+                raise typer.Exit(1)
         
-        console.print(f"[green]✓[/green] Using template: {template} ({available_templates[template]})")
-    
-    # Check requirements
-    check_requirements()
-    
-    # Show summary
-    console.print(Panel.fit(
-        f"[bold]Creating Service: {service_name}[/bold]\n\n"
-        f"Template: {template}\n"
-        f"Local Path: {local_path}\n"
-        f"VPS Host: {vps_host}\n"
-        f"Domain: {domain or 'Not configured'}\n"
-        f"DNS Provider: {dns_provider or 'N/A'}",
-        title="🚀 VPS Service Creator"
-    ))
-    
-    # Test SSH connection
-    auth_method = test_ssh_connection(vps_host)
-    
-    # Create service user on VPS
-    service_user, service_password = create_vps_user(vps_host, service_name)
-    
-    # Show credentials
-    creds_table = Table(title="🔐 Service Credentials (SAVE THESE!)")
-    creds_table.add_column("Field", style="cyan")
-    creds_table.add_column("Value", style="green")
-    creds_table.add_row("Username", service_user)
-    creds_table.add_row("Password", service_password)
-    creds_table.add_row("SSH Command", f"ssh {service_user}@{vps_host}")
-    console.print(creds_table)
-    
-    # Check for a free application port on your VPS...
-    preferred_port = 3000
-    console.print("\n[bold]Checking for a free application port on your VPS...[/bold]")
-    free_port = suggest_free_port(vps_host, preferred_port)
-    if free_port != preferred_port:
-        console.print(f"[yellow]Port {preferred_port} appears to be in use. Suggesting free port: {free_port}[/yellow]")
-        use_suggested = Confirm.ask(f"Use suggested port {free_port}?", default=True)
-        if use_suggested:
-            chosen_port = free_port
-        else:
-            while True:
+            console.print(f"[green]✓[/green] Using template: {template} ({available_templates[template]})")
+    
+        # Check requirements
+        check_requirements()
+    
+        # Show summary
+        console.print(Panel.fit(
+            f"[bold]Creating Service: {service_name}[/bold]\n\n"
+            f"Template: {template}\n"
+            f"Local Path: {local_path}\n"
+            f"VPS Host: {vps_host}\n"
+            f"Domain: {domain or 'Not configured'}\n"
+            f"DNS Provider: {dns_provider or 'N/A'}",
+            title="🚀 VPS Service Creator"
+        ))
+    
+        # Test SSH connection
+        auth_method = test_ssh_connection(vps_host)
+
+        # Establish the multiplexed master so every later ssh call reuses it
+        open_ssh_master(vps_host)
+
+        # Create service user on VPS
+        service_user, service_password = create_vps_user(vps_host, service_name)
+    
+        # Show credentials
+        console.print(render_credentials(service_user, service_password, vps_host))
+    
+        # Check for a free application port on your VPS...
+        preferred_port = 3000
+        console.print("\n[bold]Checking for a free application port on your VPS...[/bold]")
+        free_port = suggest_free_port(vps_host, preferred_port)
+        if free_port != preferred_port:
+            console.print(f"[yellow]Port {preferred_port} appears to be in use. Suggesting free port: {free_port}[/yellow]")
+            use_suggested = Confirm.ask(f"Use suggested port {free_port}?", default=True)
+            if use_suggested:
+                chosen_port = free_port
+            else:
+                # One listener scan covers every retry; no per-port SSH
+                # round-trip while the user hunts for a free port
                 try:
+                    busy_ports = _remote_busy_ports(vps_host)
+                except OSError:
+                    busy_ports = set()
+                while True:
                     desired = IntPrompt.ask("Enter desired port (1024-65535)", default=free_port)
                     if desired < 1024 or desired > 65535:
                         console.print("[red]Port must be between 1024 and 65535[/red]")
                         continue
-                    # Check if desired is free
-                    import subprocess
-                    cmd = [
-                        "ssh", "-q", "-o", "LogLevel=ERROR", f"root@{vps_host}",
-                        f"(command -v ss >/dev/null && ss -ltn '( sport = :{desired} )' | tail -n +2) || (command -v lsof >/dev/null && lsof -iTCP:{desired} -sTCP:LISTEN) || true"
-                    ]
-                    result = subprocess.run(cmd, capture_output=True, text=True)
-                    busy = bool(result.stdout.strip())
-                    if busy:
+                    if desired in busy_ports:
                         console.print(f"[red]Port {desired} is in use on the VPS. Pick another.")
                         continue
                     chosen_port = desired
                     break
-                except Exception:
-                    console.print("[red]Failed to validate port. Try again.")
-                    continue
-    else:
-        console.print(f"[green]✓[/green] Port {free_port} looks free")
-        chosen_port = free_port
-    
-    # Set up local files
-    setup_local_files(local_path, service_name, vps_manager_repo, template, domain, 
-                     dns_provider.value if dns_provider else None)
-    
-    # Ensure .env has the chosen APP_PORT
-    try:
-        env_path = local_path / ".env"
-        if not env_path.exists():
-            example_path = local_path / "env.example"
-            if example_path.exists():
-                shutil.copy2(example_path, env_path)
-        if env_path.exists():
-            env_lines = env_path.read_text().splitlines()
-            found = False
-            for i, line in enumerate(env_lines):
-                if line.startswith("APP_PORT="):
-                    env_lines[i] = f"APP_PORT={chosen_port}"
-                    found = True
-                    break
-            if not found:
-                env_lines.append(f"APP_PORT={chosen_port}")
-            env_path.write_text("\n".join(env_lines) + "\n")
-    except Exception:
-        pass
+        else:
+            console.print(f"[green]✓[/green] Port {free_port} looks free")
+            chosen_port = free_port
     
-    # Set up GitHub repo
-    repo_name = setup_github_repo(local_path, service_name, repo, vps_host, 
-                                  service_user, service_password, vps_manager_repo, domain, chosen_port)
+        # Set up local files
+        setup_local_files(local_path, service_name, vps_manager_repo, template, domain, 
+                         dns_provider.value if dns_provider else None)
     
-    # Set DNS provider token if provided
-    if dns_provider_token and domain:
-        console.print(f"[green]✓[/green] Setting DNS provider token...")
+        # Ensure .env has the chosen APP_PORT
         try:
-            sh.gh("secret", "set", "DNS_PROVIDER_TOKEN", "-b", dns_provider_token, 
-                  "--repo", repo_name)
-        except sh.ErrorReturnCode:
-            console.print(f"[yellow]Warning:[/yellow] Failed to set DNS_PROVIDER_TOKEN secret")
+            env_path = local_path / ".env"
+            if not env_path.exists():
+                example_path = local_path / "env.example"
+                if example_path.exists():
+                    shutil.copy2(example_path, env_path)
+            if env_path.exists():
+                update_env(env_path, {"APP_PORT": chosen_port})
+        except OSError:
+            pass
     
-    # Create DNS configuration if domain specified
-    pr_url = ""
-    if domain:
-        # Get VPS IP from host
-        import socket
-        try:
-            vps_ip = socket.gethostbyname(vps_host)
-        except:
-            vps_ip = vps_host  # Assume it's already an IP
-        # Prompt for Netlify team slug (optional)
-        team_slug = ""
-        if dns_provider and dns_provider.value == "netlify":
-            # Extract zone from domain
-            parts = domain.split('.')
-            zone = '.'.join(parts[-2:]) if len(parts) > 2 else domain
+        # Set up GitHub repo
+        repo_name = setup_github_repo(local_path, service_name, repo, vps_host, 
+                                      service_user, service_password, vps_manager_repo, domain, chosen_port)
+    
+        # Set DNS provider token if provided
+        if dns_provider_token and domain:
+            console.print(f"[green]✓[/green] Setting DNS provider token...")
+            import httpx
+            try:
+                ok = set_repo_secret(repo_name, "DNS_PROVIDER_TOKEN", dns_provider_token)
+            except (httpx.HTTPError, KeyError):
+                ok = False
+            if not ok:
+                console.print(f"[yellow]Warning:[/yellow] Failed to set DNS_PROVIDER_TOKEN secret")
+    
+        # Create DNS configuration if domain specified
+        pr_url = ""
+        if domain:
+            # Get VPS IP from host (bounded timeout, memoized per run)
+            vps_ip = _resolve_vps_ip(vps_host)
+            # Prompt for Netlify team slug (optional)
+            team_slug = ""
+            if dns_provider and dns_provider.value == "netlify":
+                # Extract zone from domain
+                parts = domain.split('.')
+                zone = '.'.join(parts[-2:]) if len(parts) > 2 else domain
             
-            console.print(f"\n[bold]Netlify DNS Configuration[/bold]")
-            console.print(f"Zone: {zone}")
-            console.print("\nIf this zone already exists in Netlify, leave the team slug empty.")
-            console.print("Only provide a team slug if you need to create a NEW zone.")
+                console.print(f"\n[bold]Netlify DNS Configuration[/bold]")
+                console.print(f"Zone: {zone}")
+                console.print("\nIf this zone already exists in Netlify, leave the team slug empty.")
+                console.print("Only provide a team slug if you need to create a NEW zone.")
             
-            if Confirm.ask("Does this zone need to be created?", default=False):
-                team_slug = Prompt.ask("Enter Netlify team slug", default="")
-                if team_slug:
-                    console.print(f"[green]✓[/green] Will create zone with team slug: {team_slug}")
-            else:
-                console.print(f"[green]✓[/green] Using existing zone")
-        # Write service-local DNS records JSON instead of opening a PR in vps-manager
-        write_dns_records_json(local_path, domain, vps_ip, service_name, team_slug)
-    
-    # Trigger initial deployment
-    trigger_initial_deployment(local_path, repo_name)
-    
-    # Final instructions
-    console.print("\n[bold green]✅ Service created successfully![/bold green]\n")
-    
-    links_table = Table(title="Relevant Links")
-    links_table.add_column("Description", style="cyan")
-    links_table.add_column("URL", style="blue")
-    links_table.add_row("GitHub Repo", f"https://github.com/{repo_name}")
-    links_table.add_row("GitHub Actions", f"https://github.com/{repo_name}/actions")
-    if domain:
-        links_table.add_row("Service URL", f"https://{domain}")
-    links_table.add_row("Local Path", str(local_path))
-    console.print(links_table)
-    
-    console.print("\n[bold]Next Steps:[/bold]")
-    console.print("1. Wait for the initial deployment to complete")
-    console.print("2. Update your application code in src/")
-    console.print("3. Future deployments are automatic when you push to main:")
-    console.print("   git add .")
-    console.print("   git commit -m 'Your changes'")
-    console.print("   git push")
-    
-    if domain:
-        console.print("\n[bold]DNS via CI:[/bold]")
-        console.print("- Ensure secrets.DNS_PROVIDER_TOKEN is set in your service repo")
-        console.print("- Ensure your DNS workflow passes records_path: infra/dns-records.json and sets dns_provider")
-    
-    # Clean up temp clone if used
-    if temp_clone_path:
-        try:
-            import shutil
-            shutil.rmtree(temp_clone_path.parent)
-        except:
-            pass  # Ignore cleanup errors
+                if Confirm.ask("Does this zone need to be created?", default=False):
+                    team_slug = Prompt.ask("Enter Netlify team slug", default="")
+                    if team_slug:
+                        console.print(f"[green]✓[/green] Will create zone with team slug: {team_slug}")
+                else:
+                    console.print(f"[green]✓[/green] Using existing zone")
+            # Write service-local DNS records JSON instead of opening a PR in vps-manager
+            write_dns_records_json(local_path, domain, vps_ip, service_name, team_slug)
+    
+        # Trigger initial deployment
+        trigger_initial_deployment(local_path, repo_name)
+    
+        # Final instructions, assembled into one renderable and emitted with a
+        # single print so the summary hits the terminal as one atomic write
+        from rich.console import Group
+        from rich.table import Table
+        links_table = Table(title="Relevant Links")
+        links_table.add_column("Description", style="cyan")
+        links_table.add_column("URL", style="blue")
+        links_table.add_row("GitHub Repo", f"https://github.com/{repo_name}")
+        links_table.add_row("GitHub Actions", f"https://github.com/{repo_name}/actions")
+        if domain:
+            links_table.add_row("Service URL", f"https://{domain}")
+        links_table.add_row("Local Path", str(local_path))
+
+        summary = [
+            "\n[bold green]✅ Service created successfully![/bold green]\n",
+            links_table,
+            "\n[bold]Next Steps:[/bold]",
+            "1. Wait for the initial deployment to complete",
+            "2. Update your application code in src/",
+            "3. Future deployments are automatic when you push to main:",
+            "   git add .",
+            "   git commit -m 'Your changes'",
+            "   git push",
+        ]
+        if domain:
+            summary += [
+                "\n[bold]DNS via CI:[/bold]",
+                "- Ensure secrets.DNS_PROVIDER_TOKEN is set in your service repo",
+                "- Ensure your DNS workflow passes records_path: infra/dns-records.json and sets dns_provider",
+            ]
+        console.print(Group(*summary))
+    finally:
+        # Tear down the multiplexed SSH connection
+        close_ssh_master(vps_host)
+
+        # Clean up temp clone if used; runs on error paths too
+        if temp_clone_path:
+            _discard_temp_clone(temp_clone_path.parent)
 
 
 if __name__ == "__main__":